@@ -1,93 +1,261 @@
 from docx import Document
 import re
+import zipfile
 from typing import Dict, Any
 
-def extract_entities_from_docx(uploaded_file) -> Dict[str, Any]:
-    doc = Document(uploaded_file)
-    
-    all_text = ""
-    for para in doc.paragraphs:
-        all_text += para.text + "\n"
-    
+# Reading word/document.xml directly skips construction of the
+# python-docx object tree; lxml (already a python-docx dependency)
+# parses at C speed, stdlib ElementTree is the drop-in fallback
+try:
+    from lxml import etree as _ET
+except ImportError:
+    import xml.etree.ElementTree as _ET
+
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def _w(tag):
+    return f"{{{_W_NS}}}{tag}"
+
+# Optional SIMD multi-pattern matcher used to prefilter the regex set
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+PATTERNS = {
+    'Party_A': r'Party\s+A[:\s]*\*{0,2}\s*([A-Z\s&]+?)\s*(?:\*{0,2}|\n|$)',
+    'Party_B': r'Party\s+B[:\s]*\*{0,2}\s*([A-Z\s&]+?)\s*(?:\*{0,2}|\n|$)',
+    'Trade_Date': r'Trade\s+Date[:\s]*\*{0,2}\s*([0-9]{1,2}\s+[A-Za-z]+\s+[0-9]{4})',
+    'Trade_Time': r'Trade\s+Time[:\s]*\*{0,2}\s*([0-9]{1,2}:[0-9]{2}:[0-9]{2})',
+    'Initial_Valuation_Date': r'Initial\s+Valuation\s+Date[:\s]*\*{0,2}\s*([0-9]{1,2}\s+[A-Za-z]+\s+[0-9]{4})',
+    'Effective_Date': r'Effective\s+Date[:\s]*\*{0,2}\s*([0-9]{1,2}\s+[A-Za-z]+\s+[0-9]{4})',
+    'Valuation_Date': r'(?<!Initial\s)Valuation\s+Date[:\s]*\*{0,2}\s*([0-9]{1,2}\s+[A-Za-z]+\s+[0-9]{4})',
+    'Termination_Date': r'Termination\s+Date[:\s]*\*{0,2}\s*([0-9]{1,2}\s+[A-Za-z]+\s+[0-9]{4})',
+    'Notional_Amount': r'Notional\s+Amount[^:]*[:\s]*\*{0,2}\s*(EUR\s+[0-9,\.]+\s+million)',
+    'Upfront_Payment': r'Upfront\s+Payment[:\s]*\*{0,2}\s*(\*{3}TBD\*{3}[^:]*?on\s+the\s+Effective\s+Date)',
+    'Coupon': r'Coupon[^:]*[:\s]*\*{0,2}\s*([0-9\.]+%)',
+    'Barrier': r'Barrier[^:]*[:\s]*\*{0,2}\s*([0-9\.]+%)',
+    'Underlying': r'Underlying[:\s]*\*{0,2}\s*([^:]*?\([^)]*\))',
+    'Exchange': r'Exchange[:\s]*\*{0,2}\s*([A-Z]+)',
+    'Business_Day': r'Business\s+Day[:\s]*\*{0,2}\s*([A-Z]+)',
+    'Interest_Payments': r'Interest\s+Payments[:\s]*\*{0,2}\s*([A-Za-z]+)\s*(?:\*{0,2}|\n|$)',
+    'Initial_Price': r'Initial\s+Price[^:]*[:\s]*\*{0,2}\s*(Official\s+closing[^:]*?Exchange)',
+    'Share_final': r'Share[_~]?final[_~]?[:\s]*\*{0,2}\s*(Official\s+closing[^:]*?Exchange)',
+    'Future_Price_Valuation': r'Future\s+Price\s+Valuation[:\s]*\*{0,2}\s*([A-Za-z\s]+?)(?:\*{0,2}|\n|$)',
+    'Calculation_Agent': r'Calculation\s+Agent[:\s]*\*{0,2}\s*(Party\s+[AB]\s+and\s+Party\s+[AB])',
+    'ISDA_Documentation': r'ISDA\s+Documentation[:\s]*\*{0,2}\s*([A-Za-z]+)\s*(?:\*{0,2}|\n|$)'
+}
+
+# Compiled once at import: per-call re.compile/cache lookups disappear
+_COMPILED = {field: re.compile(pat, re.IGNORECASE | re.MULTILINE) for field, pat in PATTERNS.items()}
+_STAR_RE = re.compile(r'\*+')
+_WS_RE = re.compile(r'\s+')
+
+# All patterns merged into one alternation so the document text is
+# scanned once instead of once per field. Each branch is named after its
+# field; the field's value capture is the first group inside the branch,
+# i.e. the group numbered right after the name group.
+_MERGED_RE = re.compile(
+    "|".join(f"(?P<{field}>{pat})" for field, pat in PATTERNS.items()),
+    re.IGNORECASE | re.MULTILINE
+)
+_VALUE_GROUP = {field: _MERGED_RE.groupindex[field] + 1 for field in PATTERNS}
+
+
+def _matched_field(match):
+    for field in PATTERNS:
+        if match.group(field) is not None:
+            return field
+    return None
+
+# Cheapest possible prefilter: the first literal word of each pattern.
+# One C-speed substring check per field on the lowered text rules out
+# fields whose key text never appears, without any regex machinery.
+def _trigger_word(pattern):
+    return re.search(r'[A-Za-z]+', re.sub(r'\(\?<![^)]*\)', '', pattern)).group(0).lower()
+
+_TRIGGER_WORDS = {field: _trigger_word(pat) for field, pat in PATTERNS.items()}
+
+_HS_FIELDS = list(PATTERNS)
+_HS_DB = None
+if hyperscan is not None:
+    try:
+        # HS_FLAG_PREFILTER lets hyperscan approximate constructs it cannot
+        # match exactly (e.g. lookbehind); exact capture still happens in re
+        _HS_DB = hyperscan.Database()
+        _HS_DB.compile(
+            expressions=[PATTERNS[f].encode() for f in _HS_FIELDS],
+            ids=list(range(len(_HS_FIELDS))),
+            flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_MULTILINE
+                   | hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_PREFILTER] * len(_HS_FIELDS),
+        )
+    except hyperscan.error:
+        _HS_DB = None
+
+
+def _candidate_fields(text):
+    # One vectorized multi-pattern scan narrows the field set down to
+    # patterns that can possibly match; without hyperscan, fall back to
+    # plain substring checks on each field's trigger word
+    if _HS_DB is None:
+        lowered = text.lower()
+        return {field for field, word in _TRIGGER_WORDS.items() if word in lowered}
+    hits = set()
+
+    def on_match(pat_id, start, end, flags, context=None):
+        hits.add(_HS_FIELDS[pat_id])
+
+    _HS_DB.scan(text.encode("utf-8", "ignore"), match_event_handler=on_match)
+    return hits
+
+def _xml_text(element):
+    # Concatenated text of all w:t runs under the element
+    return "".join(t.text or "" for t in element.iter(_w("t")))
+
+
+def _parse_docx_xml(uploaded_file):
+    # C-level XML walk over word/document.xml: same text and table rows
+    # as the python-docx traversal (body paragraphs first, then tables)
+    # without building Paragraph/Table/Row/Cell wrapper objects
+    with zipfile.ZipFile(uploaded_file) as z:
+        root = _ET.fromstring(z.read("word/document.xml"))
+    body = root.find(_w("body"))
+
+    parts = []
+    table_parts = []
+    table_rows = []
+    for child in body:
+        if child.tag == _w("p"):
+            parts.append(_xml_text(child))
+        elif child.tag == _w("tbl"):
+            for row in child.findall(_w("tr")):
+                cells = []
+                for tc in row.findall(_w("tc")):
+                    cell_text = "\n".join(_xml_text(p) for p in tc.findall(_w("p"))).strip()
+                    if cell_text:
+                        cells.append(cell_text)
+                if len(cells) >= 2:
+                    table_rows.append((cells[0], cells[1]))
+                table_parts.append(" ".join(cells))
+    return "\n".join(parts + table_parts) + "\n", table_rows
+
+
+def _walk_document(doc):
+    # One traversal builds the text fragments and the (key, value) table
+    # rows; joining once avoids the O(n^2) copies of += concatenation.
+    # Deliberately single-threaded: this is only the fallback path, the
+    # primary _parse_docx_xml already walks the raw XML at C speed, and
+    # splitting paragraphs/tables across threads isn't worth it here
+    parts = [para.text for para in doc.paragraphs]
     table_rows = []
     for table in doc.tables:
         for row in table.rows:
             cells = [cell.text.strip() for cell in row.cells if cell.text.strip()]
             if len(cells) >= 2:
                 table_rows.append((cells[0], cells[1]))
-            all_text += " ".join(cells) + "\n"
-    
-    entities = {}
-    
-    key_mappings = {
-        'Party A': 'Party_A',
-        'Party B': 'Party_B',
-        'Trade Date': 'Trade_Date', 
-        'Trade Time': 'Trade_Time',
-        'Initial Valuation Date': 'Initial_Valuation_Date',
-        'Effective Date': 'Effective_Date',
-        'Valuation Date': 'Valuation_Date',
-        'Termination Date': 'Termination_Date',
-        'Notional Amount': 'Notional_Amount',
-        'Notional Amount (N)': 'Notional_Amount',
-        'Upfront Payment': 'Upfront_Payment',
-        'Coupon': 'Coupon',
-        'Coupon (C)': 'Coupon',
-        'Barrier': 'Barrier',
-        'Barrier (B)': 'Barrier',
-        'Underlying': 'Underlying',
-        'Exchange': 'Exchange',
-        'Business Day': 'Business_Day',
-        'Interest Payments': 'Interest_Payments',
-        'Initial Price': 'Initial_Price',
-        'Initial Price (Shareini)': 'Initial_Price',
-        'Sharefinal': 'Share_final',
-        'Future Price Valuation': 'Future_Price_Valuation',
-        'Calculation Agent': 'Calculation_Agent',
-        'ISDA Documentation': 'ISDA_Documentation'
-    }
-    
-    for entity_key in key_mappings.values():
-        entities[entity_key] = None
-    
+            parts.append(" ".join(cells))
+    return "\n".join(parts) + "\n", table_rows
+
+
+# Table-row key -> entity field, normalized to lowercase once at import
+# so each row lookup is a single dict probe, case-insensitively
+_KEY_MAP = {key.lower(): field for key, field in {
+    'Party A': 'Party_A',
+    'Party B': 'Party_B',
+    'Trade Date': 'Trade_Date',
+    'Trade Time': 'Trade_Time',
+    'Initial Valuation Date': 'Initial_Valuation_Date',
+    'Effective Date': 'Effective_Date',
+    'Valuation Date': 'Valuation_Date',
+    'Termination Date': 'Termination_Date',
+    'Notional Amount': 'Notional_Amount',
+    'Notional Amount (N)': 'Notional_Amount',
+    'Upfront Payment': 'Upfront_Payment',
+    'Coupon': 'Coupon',
+    'Coupon (C)': 'Coupon',
+    'Barrier': 'Barrier',
+    'Barrier (B)': 'Barrier',
+    'Underlying': 'Underlying',
+    'Exchange': 'Exchange',
+    'Business Day': 'Business_Day',
+    'Interest Payments': 'Interest_Payments',
+    'Initial Price': 'Initial_Price',
+    'Initial Price (Shareini)': 'Initial_Price',
+    'Sharefinal': 'Share_final',
+    'Future Price Valuation': 'Future_Price_Valuation',
+    'Calculation Agent': 'Calculation_Agent',
+    'ISDA Documentation': 'ISDA_Documentation'
+}.items()}
+# Output fields in first-seen order, matching the old dict construction
+_KEY_FIELDS = tuple(dict.fromkeys(_KEY_MAP.values()))
+
+
+def extract_entities_from_docx(uploaded_file) -> Dict[str, Any]:
+    try:
+        all_text, table_rows = _parse_docx_xml(uploaded_file)
+    except Exception:
+        # Anything unexpected in the raw XML: fall back to python-docx
+        if hasattr(uploaded_file, "seek"):
+            uploaded_file.seek(0)
+        all_text, table_rows = _walk_document(Document(uploaded_file))
+
+    entities = dict.fromkeys(_KEY_FIELDS, None)
+
     for key, value in table_rows:
-        clean_key = re.sub(r'\*+', '', key).strip()
-        if clean_key in key_mappings:
-            clean_value = re.sub(r'\*+', '', value).strip()
-            entities[key_mappings[clean_key]] = clean_value
-    
-    patterns = {
-        'Party_A': r'Party\s+A[:\s]*\*{0,2}\s*([A-Z\s&]+?)\s*(?:\*{0,2}|\n|$)',
-        'Party_B': r'Party\s+B[:\s]*\*{0,2}\s*([A-Z\s&]+?)\s*(?:\*{0,2}|\n|$)',
-        'Trade_Date': r'Trade\s+Date[:\s]*\*{0,2}\s*([0-9]{1,2}\s+[A-Za-z]+\s+[0-9]{4})',
-        'Trade_Time': r'Trade\s+Time[:\s]*\*{0,2}\s*([0-9]{1,2}:[0-9]{2}:[0-9]{2})',
-        'Initial_Valuation_Date': r'Initial\s+Valuation\s+Date[:\s]*\*{0,2}\s*([0-9]{1,2}\s+[A-Za-z]+\s+[0-9]{4})',
-        'Effective_Date': r'Effective\s+Date[:\s]*\*{0,2}\s*([0-9]{1,2}\s+[A-Za-z]+\s+[0-9]{4})',
-        'Valuation_Date': r'(?<!Initial\s)Valuation\s+Date[:\s]*\*{0,2}\s*([0-9]{1,2}\s+[A-Za-z]+\s+[0-9]{4})',
-        'Termination_Date': r'Termination\s+Date[:\s]*\*{0,2}\s*([0-9]{1,2}\s+[A-Za-z]+\s+[0-9]{4})',
-        'Notional_Amount': r'Notional\s+Amount[^:]*[:\s]*\*{0,2}\s*(EUR\s+[0-9,\.]+\s+million)',
-        'Upfront_Payment': r'Upfront\s+Payment[:\s]*\*{0,2}\s*(\*{3}TBD\*{3}[^:]*?on\s+the\s+Effective\s+Date)',
-        'Coupon': r'Coupon[^:]*[:\s]*\*{0,2}\s*([0-9\.]+%)',
-        'Barrier': r'Barrier[^:]*[:\s]*\*{0,2}\s*([0-9\.]+%)',
-        'Underlying': r'Underlying[:\s]*\*{0,2}\s*([^:]*?\([^)]*\))',
-        'Exchange': r'Exchange[:\s]*\*{0,2}\s*([A-Z]+)',
-        'Business_Day': r'Business\s+Day[:\s]*\*{0,2}\s*([A-Z]+)',
-        'Interest_Payments': r'Interest\s+Payments[:\s]*\*{0,2}\s*([A-Za-z]+)\s*(?:\*{0,2}|\n|$)',
-        'Initial_Price': r'Initial\s+Price[^:]*[:\s]*\*{0,2}\s*(Official\s+closing[^:]*?Exchange)',
-        'Share_final': r'Share[_~]?final[_~]?[:\s]*\*{0,2}\s*(Official\s+closing[^:]*?Exchange)',
-        'Future_Price_Valuation': r'Future\s+Price\s+Valuation[:\s]*\*{0,2}\s*([A-Za-z\s]+?)(?:\*{0,2}|\n|$)',
-        'Calculation_Agent': r'Calculation\s+Agent[:\s]*\*{0,2}\s*(Party\s+[AB]\s+and\s+Party\s+[AB])',
-        'ISDA_Documentation': r'ISDA\s+Documentation[:\s]*\*{0,2}\s*([A-Za-z]+)\s*(?:\*{0,2}|\n|$)'
-    }
+        field = _KEY_MAP.get(_STAR_RE.sub('', key).strip().lower())
+        if field is not None:
+            entities[field] = _STAR_RE.sub('', value).strip()
     
-    for field, pattern in patterns.items():
-        if not entities.get(field):
-            match = re.search(pattern, all_text, re.IGNORECASE | re.MULTILINE)
+    missing = {field for field in PATTERNS if not entities.get(field)}
+    if not missing:
+        # Well-formed documents fill every field from the table rows;
+        # skip the regex machinery (and the prefilter scan) entirely
+        return entities
+
+    missing &= _candidate_fields(all_text)
+
+    if _HS_DB is not None:
+        # The vectorized DFA already walked the text once and reported
+        # exactly which patterns can match; run only those through re for
+        # the value captures and skip the NFA alternation entirely
+        for field in missing:
+            match = _COMPILED[field].search(all_text)
             if match:
                 value = match.group(1).strip()
-                value = re.sub(r'\*+', '', value).strip()
-                value = re.sub(r'\s+', ' ', value)
+                value = _STAR_RE.sub('', value).strip()
+                value = _WS_RE.sub(' ', value)
                 if value:
                     entities[field] = value
-    
+        return entities
+
+    # Single linear pass with the merged alternation; first match per
+    # field wins, like the old per-pattern re.search
+    if missing:
+        for match in _MERGED_RE.finditer(all_text):
+            field = _matched_field(match)
+            if field not in missing:
+                continue
+            value = match.group(_VALUE_GROUP[field])
+            if not value:
+                continue
+            value = _STAR_RE.sub('', value.strip()).strip()
+            value = _WS_RE.sub(' ', value)
+            if value:
+                entities[field] = value
+                missing.discard(field)
+            if not missing:
+                break
+
+    # Alternation matches cannot overlap, so a field whose occurrence was
+    # swallowed by an earlier branch still gets its individual scan
+    for field in missing:
+        match = _COMPILED[field].search(all_text)
+        if match:
+            value = match.group(1).strip()
+            value = _STAR_RE.sub('', value).strip()
+            value = _WS_RE.sub(' ', value)
+            if value:
+                entities[field] = value
+
     return entities
\ No newline at end of file
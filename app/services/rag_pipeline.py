@@ -1,5 +1,18 @@
 import chromadb
+from chromadb.config import Settings as ChromaSettings
+import functools
+import hashlib
+import numpy as np
 import os
+import sqlite3
+import threading
+import torch
+# Optional persistent answer cache; without it the in-process caches
+# below still cover repeat queries within one worker's lifetime
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
 from dotenv import load_dotenv
 from llama_index.core import SimpleDirectoryReader, StorageContext, VectorStoreIndex, Settings
 from llama_index.embeddings.huggingface import HuggingFaceEmbedding
@@ -16,20 +29,30 @@ documents = SimpleDirectoryReader('docs').load_data()
 
 
 # embed_model = HuggingFaceEmbedding(model_name="BAAI/bge-base-en-v1.5")
-embed_model = HuggingFaceEmbedding()
+# Batched embedding amortizes tokenizer and forward-pass overhead across
+# 64 chunks per call instead of paying it per chunk during ingestion
+embed_model = HuggingFaceEmbedding(
+    embed_batch_size=64,
+    device="cuda" if torch.cuda.is_available() else "cpu",
+)
 Settings.embed_model = embed_model
 
+
+@functools.lru_cache(maxsize=1024)
+def _query_embedding(query):
+    # Memoize query embeddings so repeat questions skip the encoder
+    # forward pass; a wrapper function because the pydantic-based
+    # embedding model rejects attribute assignment
+    return embed_model.get_query_embedding(query)
+
 # Define LLM Model
 llm = Gemini()
 Settings.llm = llm
 
-def data_ingestion(folder_path, chroma_db_path):
-    os.makedirs(folder_path, exist_ok=True)
-    documents = SimpleDirectoryReader(folder_path).load_data()
+def _insert_documents(documents, chroma_db_path):
     splitter = SentenceSplitter(chunk_size=1024, chunk_overlap=128)
 
-    db = chromadb.PersistentClient(path=chroma_db_path)
-    chroma_collection = db.get_or_create_collection("DB_collection")
+    chroma_collection = _collection(chroma_db_path)
 
     vector_store = ChromaVectorStore(chroma_collection=chroma_collection)
     storage_context = StorageContext.from_defaults(vector_store=vector_store)
@@ -40,11 +63,208 @@ def data_ingestion(folder_path, chroma_db_path):
         embed_model=embed_model,
         transformations=[splitter]
         )
+    # New documents change what queries should retrieve; the engine cache
+    # is dropped too so retrieval sees the refreshed collection
+    _cached_query.cache_clear()
+    _get_query_engine.cache_clear()
+    _hot_query_invalidate(chroma_db_path)
+    cache = _disk_cache(chroma_db_path)
+    if cache is not None:
+        cache.clear()
+    with _semantic_lock:
+        _semantic_entries.pop(chroma_db_path, None)
+
+
+def data_ingestion(folder_path, chroma_db_path):
+    os.makedirs(folder_path, exist_ok=True)
+    documents = SimpleDirectoryReader(folder_path).load_data()
+    _insert_documents(documents, chroma_db_path)
+
+
+def data_ingestion_single(file_path, chroma_db_path, sha256=None):
+    # Embed and insert only the newly added file instead of re-processing
+    # the whole upload folder on every request
+    documents = SimpleDirectoryReader(input_files=[file_path]).load_data()
+    if sha256:
+        for doc in documents:
+            doc.metadata["sha256"] = sha256
+    _insert_documents(documents, chroma_db_path)
+
+
+def is_ingested(chroma_db_path, sha256):
+    chroma_collection = _collection(chroma_db_path)
+    existing = chroma_collection.get(where={"sha256": sha256}, limit=1)
+    return len(existing["ids"]) > 0
+
+
+@functools.lru_cache(maxsize=8)
+def _client(chroma_db_path):
+    # Opening a PersistentClient reopens SQLite and reloads HNSW metadata,
+    # so keep one handle per path for the life of the process
+    return chromadb.PersistentClient(
+        path=chroma_db_path,
+        settings=ChromaSettings(anonymized_telemetry=False)
+    )
+
+
+# HNSW tuning: higher M/construction_ef builds a better graph once at
+# ingest time, lower search_ef keeps per-query traversals short on this
+# small single-session corpus. All env-overridable for benchmarking.
+HNSW_M = int(os.getenv("HNSW_M", "32"))
+HNSW_CONSTRUCTION_EF = int(os.getenv("HNSW_CONSTRUCTION_EF", "200"))
+HNSW_SEARCH_EF = int(os.getenv("HNSW_SEARCH_EF", "40"))
+
+
+def _collection(chroma_db_path):
+    return _client(chroma_db_path).get_or_create_collection(
+        "DB_collection",
+        metadata={
+            "hnsw:space": "cosine",
+            "hnsw:M": HNSW_M,
+            "hnsw:construction_ef": HNSW_CONSTRUCTION_EF,
+            "hnsw:search_ef": HNSW_SEARCH_EF,
+        }
+    )
+
+
+def warm_up(chroma_db_path):
+    # Called from the API lifespan so the first query doesn't pay the
+    # client and index-metadata load
+    _collection(chroma_db_path)
+
+
+# Retrieval fan-out is env-tunable so recall/latency can be traded off
+# without a code change
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", "3"))
+
+# Near-duplicate questions (cosine similarity of query embeddings at or
+# above the threshold) reuse the cached answer instead of calling the LLM
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_MAX = 256
+
+_semantic_lock = threading.Lock()
+_semantic_entries = {}
+
+
+@functools.lru_cache(maxsize=8)
+def _disk_cache(chroma_db_path):
+    if diskcache is None:
+        return None
+    return diskcache.Cache(os.path.join(chroma_db_path, "query_cache"))
+
+
+def _query_vector(query):
+    vec = np.asarray(_query_embedding(query), dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+def _semantic_get(chroma_db_path, query):
+    with _semantic_lock:
+        entries = list(_semantic_entries.get(chroma_db_path, ()))
+    if not entries:
+        return None
+    vec = _query_vector(query)
+    sims = np.stack([entry[0] for entry in entries]) @ vec
+    best = int(sims.argmax())
+    if sims[best] >= SEMANTIC_CACHE_THRESHOLD:
+        return entries[best][1]
+    return None
+
+
+def _semantic_record(chroma_db_path, query, response):
+    vec = _query_vector(query)
+    with _semantic_lock:
+        entries = _semantic_entries.setdefault(chroma_db_path, [])
+        entries.append((vec, response))
+        # Bounded scan: keep only the most recent entries
+        del entries[:-SEMANTIC_CACHE_MAX]
+
+
+# Queries asked at least this often get their answer persisted in a
+# sidecar table, surviving process restarts unlike the in-process LRU
+HOT_QUERY_THRESHOLD = int(os.getenv("HOT_QUERY_THRESHOLD", "3"))
+
+_hot_query_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=8)
+def _hot_query_db(chroma_db_path):
+    os.makedirs(chroma_db_path, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(chroma_db_path, "hot_queries.db"), check_same_thread=False)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS hot_queries ("
+        "query_hash TEXT PRIMARY KEY, hits INTEGER NOT NULL, response TEXT)"
+    )
+    conn.commit()
+    return conn
+
+
+def _hot_query_get(chroma_db_path, query_hash):
+    with _hot_query_lock:
+        row = _hot_query_db(chroma_db_path).execute(
+            "SELECT response FROM hot_queries WHERE query_hash = ?", (query_hash,)
+        ).fetchone()
+    return row[0] if row else None
+
+
+def _hot_query_record(chroma_db_path, query_hash, response):
+    # Count the miss; once the same query crosses the threshold, persist
+    # its answer so future processes can serve it as a dict lookup
+    with _hot_query_lock:
+        conn = _hot_query_db(chroma_db_path)
+        conn.execute(
+            "INSERT INTO hot_queries (query_hash, hits, response) VALUES (?, 0, NULL) "
+            "ON CONFLICT(query_hash) DO NOTHING", (query_hash,)
+        )
+        conn.execute("UPDATE hot_queries SET hits = hits + 1 WHERE query_hash = ?", (query_hash,))
+        conn.execute(
+            "UPDATE hot_queries SET response = ? WHERE query_hash = ? AND hits >= ?",
+            (response, query_hash, HOT_QUERY_THRESHOLD)
+        )
+        conn.commit()
+
+
+def _hot_query_invalidate(chroma_db_path):
+    # New documents change retrieval results; keep the hit counts but drop
+    # the stored answers
+    with _hot_query_lock:
+        conn = _hot_query_db(chroma_db_path)
+        conn.execute("UPDATE hot_queries SET response = NULL")
+        conn.commit()
 
 
 def handle_query(query, chroma_db_path):
-    db = chromadb.PersistentClient(path=chroma_db_path)
-    chroma_collection = db.get_or_create_collection("DB_collection")
+    # Tiered caching in cost order: exact matches (hot table, persistent
+    # disk cache, in-process LRU) are dict lookups; the semantic tier pays
+    # one encoder forward pass; only a full miss reaches the LLM
+    normalized = " ".join(query.split())
+    query_hash = hashlib.sha1(normalized.lower().encode()).hexdigest()
+    hot = _hot_query_get(chroma_db_path, query_hash)
+    if hot is not None:
+        return hot
+    cache = _disk_cache(chroma_db_path)
+    if cache is not None:
+        stored = cache.get(query_hash)
+        if stored is not None:
+            return stored
+    semantic = _semantic_get(chroma_db_path, normalized)
+    if semantic is not None:
+        return semantic
+    response = _cached_query(normalized, chroma_db_path)
+    _hot_query_record(chroma_db_path, query_hash, response)
+    if cache is not None:
+        cache.set(query_hash, response)
+    _semantic_record(chroma_db_path, normalized, response)
+    return response
+
+
+@functools.lru_cache(maxsize=8)
+def _get_query_engine(chroma_db_path):
+    # Building the vector store, index wrapper and query engine is pure
+    # object plumbing that doesn't depend on the query; construct it once
+    # per collection and let every query reuse it
+    chroma_collection = _collection(chroma_db_path)
 
     vector_store = ChromaVectorStore(chroma_collection=chroma_collection)
     storage_context = StorageContext.from_defaults(vector_store=vector_store)
@@ -54,8 +274,12 @@ def handle_query(query, chroma_db_path):
         embed_model=embed_model,
         storage_context=storage_context
     )
-    query_engine = index.as_query_engine(llm=llm, similarity_top_k=3, verbose=True, response="refine")
-    response = query_engine.query(query)
-    return response
+    return index.as_query_engine(llm=llm, similarity_top_k=RAG_TOP_K, verbose=True, response="refine")
+
+
+@functools.lru_cache(maxsize=512)
+def _cached_query(query, chroma_db_path):
+    response = _get_query_engine(chroma_db_path).query(query)
+    return str(response)
 
 
@@ -1,5 +1,7 @@
 import spacy
+import functools
 import os
+import torch
 from dotenv import load_dotenv
 from transformers import AutoTokenizer, AutoModelForTokenClassification, pipeline
 load_dotenv()
@@ -11,9 +13,18 @@ HF_TOKEN = os.getenv("HF_TOKEN")
 os.environ["TRANSFORMERS_CACHE"] = "./hf_cache"
 
 
+# Optional int8 ONNX Runtime backend for CPU inference; the quantized
+# model is produced once by scripts/quantize_ner.py
+try:
+    from optimum.onnxruntime import ORTModelForTokenClassification
+except ImportError:
+    ORTModelForTokenClassification = None
+
+
 MODEL_NAME = "dslim/bert-base-NER"
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-model = AutoModelForTokenClassification.from_pretrained(MODEL_NAME)
+NER_ONNX_DIR = os.getenv("NER_ONNX_DIR", "./ner-int8")
+# NER_DEVICE=cpu forces the CPU path even when CUDA is visible
+_USE_GPU = torch.cuda.is_available() and os.getenv("NER_DEVICE", "auto") != "cpu"
 
 
 
@@ -29,20 +40,47 @@ model = AutoModelForTokenClassification.from_pretrained(MODEL_NAME)
 #     return entities
 
 
-ner_pipeline = pipeline(
-    "ner",
-    model=model,
-    tokenizer=tokenizer,
-    aggregation_strategy="simple",
-    device=-1
-)
+@functools.lru_cache(maxsize=1)
+def _get_pipeline():
+    # Lazy singleton: the ~400MB weight load happens once, on the first
+    # text-extraction request, instead of at import in every worker that
+    # may never serve /extract/text
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    if not _USE_GPU and ORTModelForTokenClassification is not None and os.path.isdir(NER_ONNX_DIR):
+        # int8 GEMM does ~4x the dot products per cycle of FP32 on CPUs
+        # with VNNI, and the quantized model loads ~4x faster
+        model = ORTModelForTokenClassification.from_pretrained(NER_ONNX_DIR)
+        return pipeline(
+            "ner",
+            model=model,
+            tokenizer=tokenizer,
+            aggregation_strategy="simple",
+            device=-1
+        )
+    model = AutoModelForTokenClassification.from_pretrained(MODEL_NAME)
+    if _USE_GPU:
+        # FP16 on GPU doubles throughput and halves VRAM for inference
+        model = model.half()
+    return pipeline(
+        "ner",
+        model=model,
+        tokenizer=tokenizer,
+        aggregation_strategy="simple",
+        device=0 if _USE_GPU else -1
+    )
+
+NER_BATCH_SIZE = int(os.getenv("NER_BATCH_SIZE", "32"))
+
+
+def _format_entities(ner_results):
+    return [{"text": ent["word"], "label": ent["entity_group"]} for ent in ner_results]
+
 
 def extract_financial_entities_from_text(text: str):
-    ner_results = ner_pipeline(text)
-    entities = []
-    for ent in ner_results:
-        entities.append({
-            "text": ent["word"],
-            "label": ent["entity_group"]
-        })
-    return entities
\ No newline at end of file
+    return _format_entities(_get_pipeline()(text))
+
+
+def extract_financial_entities_batch(texts):
+    # Run all documents through the pipeline in one call so tokenizer and
+    # forward-pass overhead is amortized across the batch
+    return [_format_entities(res) for res in _get_pipeline()(texts, batch_size=NER_BATCH_SIZE)]
\ No newline at end of file
@@ -0,0 +1,9 @@
+import os
+
+# Production launch config: one Uvicorn worker per core so CPU-bound NER
+# and embedding work runs in parallel across processes. Each worker pays
+# the model-load cost once at startup (app.api.main's lifespan hook).
+bind = "0.0.0.0:8000"
+workers = int(os.getenv("WEB_WORKERS", os.cpu_count() or 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = 120
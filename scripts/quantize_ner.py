@@ -0,0 +1,31 @@
+"""One-time export and int8 quantization of the NER model for CPU serving.
+
+Writes an ONNX model dynamically quantized for AVX-512 VNNI to the given
+directory (default ./ner-int8, picked up via the NER_ONNX_DIR env var by
+app.services.text_ner). Run once at build/deploy time:
+
+    python scripts/quantize_ner.py [output_dir]
+"""
+import sys
+
+from optimum.onnxruntime import ORTModelForTokenClassification, ORTQuantizer
+from optimum.onnxruntime.configuration import AutoQuantizationConfig
+from transformers import AutoTokenizer
+
+MODEL_NAME = "dslim/bert-base-NER"
+
+
+def main():
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else "./ner-int8"
+    model = ORTModelForTokenClassification.from_pretrained(MODEL_NAME, export=True)
+    quantizer = ORTQuantizer.from_pretrained(model)
+    quantizer.quantize(
+        save_dir=output_dir,
+        quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False)
+    )
+    AutoTokenizer.from_pretrained(MODEL_NAME).save_pretrained(output_dir)
+    print(f"Quantized NER model written to {output_dir}")
+
+
+if __name__ == "__main__":
+    main()